@@ -0,0 +1,31 @@
+"""
+Gunicorn configuration for the AI service (Linux/macOS deployments)
+
+Usage: gunicorn -c gunicorn_config.py app:app
+"""
+
+import multiprocessing
+import os
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:5001')
+
+# gevent workers: each request blocked on a RunPod poll only parks a green thread;
+# local BART inference runs on gevent's native thread pool so it doesn't block them
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'gevent')
+# Each worker holds its own copy of the local models, so only fan out to 2x CPU
+# workers when they share a model server (MODEL_SERVER_URL)
+default_workers = multiprocessing.cpu_count() * 2 if os.getenv('MODEL_SERVER_URL') else 2
+workers = int(os.getenv('GUNICORN_WORKERS') or default_workers)
+worker_connections = int(os.getenv('GUNICORN_WORKER_CONNECTIONS', '200'))
+
+# RunPod jobs are polled for up to 240s; gunicorn's 30s default would kill them
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '300'))
+keepalive = 5
+
+# Let app.py know which worker class it runs under (it monkey-patches for gevent)
+os.environ['GUNICORN_WORKER_CLASS'] = worker_class
+
+def post_worker_init(worker):
+    """Load the local models before the worker takes requests, instead of on the first one"""
+    from app import ensure_models_loaded
+    ensure_models_loaded()
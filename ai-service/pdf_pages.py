@@ -0,0 +1,61 @@
+"""
+PDF text extraction for the standalone test script.
+Kept apart from app.py so worker processes only import the PDF libraries
+(on Windows every worker is spawned and re-imports its target's module).
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+# pypdfium2 (PDFium bindings) is optional and much faster than PyPDF2 when installed
+try:
+    import pypdfium2 as pdfium
+except ImportError:
+    pdfium = None
+
+# Starting a worker costs far more than extracting a few dozen pages, so only
+# large PDFs are split across processes
+PDF_PAGES_PER_WORKER = 200
+
+def extract_pages(file_path, start, end):
+    """Text of pages [start, end); runs in a worker process, so it opens its own reader"""
+    if pdfium is not None:
+        pdf = pdfium.PdfDocument(file_path)
+        try:
+            return [pdf[i].get_textpage().get_text_range() for i in range(start, end)]
+        finally:
+            pdf.close()
+
+    import PyPDF2
+    with open(file_path, 'rb') as f:
+        reader = PyPDF2.PdfReader(f)
+        return [reader.pages[i].extract_text() for i in range(start, end)]
+
+def count_pages(file_path):
+    if pdfium is not None:
+        pdf = pdfium.PdfDocument(file_path)
+        try:
+            return len(pdf)
+        finally:
+            pdf.close()
+
+    import PyPDF2
+    with open(file_path, 'rb') as f:
+        return len(PyPDF2.PdfReader(f).pages)
+
+def extract_pdf_text(file_path):
+    """Text of every page (each followed by a newline), page ranges split across processes"""
+    num_pages = count_pages(file_path)
+    workers = min(os.cpu_count() or 1, -(-num_pages // PDF_PAGES_PER_WORKER))
+
+    if workers <= 1:
+        pages = extract_pages(file_path, 0, num_pages)
+    else:
+        step = -(-num_pages // workers)
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(extract_pages, file_path, start, min(start + step, num_pages))
+                       for start in range(0, num_pages, step)]
+            # Submitted in page order, so joining the futures in order keeps the document order
+            pages = [page for future in futures for page in future.result()]
+
+    return ''.join(page + "\n" for page in pages)
@@ -0,0 +1,52 @@
+"""Tests for request validation and reply parsing on the /analyze route"""
+
+import pytest
+
+import app as service
+
+
+@pytest.mark.parametrize('body, error', [
+    ({}, 'No text provided'),
+    ({'text': ''}, 'No text provided'),
+    ({'text': 123}, 'text must be a string'),
+    ({'text': ['a']}, 'text must be a string'),
+])
+def test_analyze_rejects_missing_or_non_string_text(body, error):
+    response = service.app.test_client().post('/analyze', json=body)
+    assert response.status_code == 400
+    assert response.get_json() == {'error': error}
+
+
+def test_analyze_splits_string_keywords_and_metrics(monkeypatch):
+    reply = ('{"summary": "Revenue grew strongly.", "keywords": "revenue, growth\\nmargin", '
+             '"metrics": "Revenue: $1,200 million\\nMargin: 28.5%", "insights": "Keep growing."}')
+    monkeypatch.setattr(service, 'call_runpod_llama', lambda *args, **kwargs: reply)
+    text = "Revenue reached $1,200 million while margin held at 28.5% on steady growth."
+
+    response = service.app.test_client().post('/analyze', json={'text': text})
+    result = response.get_json()
+
+    assert response.status_code == 200
+    assert result['keywords'] == ['revenue', 'growth', 'margin']
+    assert result['metrics'] == ['Revenue: $1,200 million', 'Margin: 28.5%']
+
+
+def test_analyze_reuses_results_only_at_cacheable_temperatures(monkeypatch):
+    calls = []
+
+    def fake_runpod(*args, **kwargs):
+        calls.append(args)
+        return '{"summary": "Sales rose.", "keywords": ["sales"], "metrics": []}'
+
+    monkeypatch.setattr(service, 'call_runpod_llama', fake_runpod)
+    client = service.app.test_client()
+
+    monkeypatch.setattr(service, 'DOCUMENT_CACHE_ENABLED', False)
+    for _ in range(2):
+        client.post('/analyze', json={'text': "Sales rose in the sampled quarter."})
+    assert len(calls) == 2
+
+    monkeypatch.setattr(service, 'DOCUMENT_CACHE_ENABLED', True)
+    for _ in range(2):
+        client.post('/analyze', json={'text': "Sales rose in the greedy quarter."})
+    assert len(calls) == 3
@@ -0,0 +1,23 @@
+"""Tests for the sentence de-duplication in clean_generated_text"""
+
+from app import clean_generated_text
+
+
+def test_sentences_differing_only_in_figures_are_kept():
+    text = ("Total revenue for the European segment grew to 4200 million dollars this year! "
+            "Total revenue for the European segment grew to 4900 million dollars this year! "
+            "Margins held.")
+    cleaned = clean_generated_text(text)
+    assert "4200 million" in cleaned
+    assert "4900 million" in cleaned
+
+
+def test_exact_duplicates_are_dropped():
+    text = "Revenue grew strongly this quarter. revenue  grew strongly this QUARTER. Costs fell sharply overall."
+    assert clean_generated_text(text) == "Revenue grew strongly this quarter. Costs fell sharply overall."
+
+
+def test_near_duplicates_with_same_figures_are_dropped():
+    text = ("Quarterly revenue grew to 4200 million across European markets. "
+            "Quarterly revenue rose to 4200 million across European markets.")
+    assert clean_generated_text(text) == "Quarterly revenue grew to 4200 million across European markets."
@@ -0,0 +1,42 @@
+"""Tests for DynamicBatcher's coalescing of concurrent pipeline calls"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+from app import DynamicBatcher
+
+
+def test_concurrent_calls_share_one_batched_pipeline_call():
+    calls = []
+
+    def pipe(texts, **kwargs):
+        calls.append((list(texts), kwargs))
+        return [{'summary_text': text.upper()} for text in texts]
+
+    # A long wait means only max_size can trigger the flush, so all four share it
+    batcher = DynamicBatcher(pipe, "Test", max_size=4, max_wait_ms=5000, timeout=10)
+    texts = [f"document {i}" for i in range(4)]
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        results = list(pool.map(lambda text: batcher(text, max_length=50), texts))
+
+    assert results == [[{'summary_text': text.upper()}] for text in texts]
+    assert len(calls) == 1
+    batch, kwargs = calls[0]
+    assert sorted(batch) == texts
+    assert kwargs == {'batch_size': 4, 'max_length': 50}
+
+
+def test_different_kwargs_run_as_separate_batches():
+    calls = []
+
+    def pipe(texts, **kwargs):
+        calls.append(kwargs)
+        return [{'summary_text': text} for text in texts]
+
+    batcher = DynamicBatcher(pipe, "Test", max_size=2, max_wait_ms=5000, timeout=10)
+    futures = [batcher.submit("a", max_length=50), batcher.submit("b", max_length=75)]
+
+    assert [future.result(timeout=10) for future in futures] == [
+        [{'summary_text': 'a'}], [{'summary_text': 'b'}]
+    ]
+    assert sorted(call['max_length'] for call in calls) == [50, 75]
+    assert all(call['batch_size'] == 1 for call in calls)
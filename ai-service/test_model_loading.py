@@ -0,0 +1,21 @@
+"""Tests for ensure_models_loaded's retry after a failed load"""
+
+import app as service
+
+
+def test_failed_load_is_retried_after_the_backoff(monkeypatch):
+    outcomes = [False, True]
+    monkeypatch.setattr(service, 'load_models', lambda: outcomes.pop(0))
+    monkeypatch.setattr(service, 'models_loaded', False)
+    monkeypatch.setattr(service, '_models_load_failed_at', float('-inf'))
+    monkeypatch.setattr(service, 'MODEL_LOAD_RETRY_SECONDS', 3600)
+
+    assert service.ensure_models_loaded() is False
+    # Still inside the backoff window: no second attempt
+    assert service.ensure_models_loaded() is False
+    assert outcomes == [True]
+
+    monkeypatch.setattr(service, 'MODEL_LOAD_RETRY_SECONDS', 0)
+    assert service.ensure_models_loaded() is True
+    assert service.ensure_models_loaded() is True
+    assert outcomes == []
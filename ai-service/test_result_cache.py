@@ -0,0 +1,30 @@
+"""Tests for cached_by_content and its Uncached escape hatch"""
+
+from app import ResultCache, Uncached, cached_by_content
+
+
+def test_results_are_cached_by_content():
+    calls = []
+
+    @cached_by_content(ResultCache(maxsize=8))
+    def analyze(text):
+        calls.append(text)
+        return ['result']
+
+    assert analyze('same document') == ['result']
+    assert analyze('same document') == ['result']
+    assert calls == ['same document']
+
+
+def test_uncached_fallbacks_are_retried():
+    calls = []
+
+    @cached_by_content(ResultCache(maxsize=8))
+    def analyze(text):
+        calls.append(text)
+        return Uncached('fallback') if len(calls) == 1 else 'real answer'
+
+    assert analyze('same document') == 'fallback'
+    assert analyze('same document') == 'real answer'
+    assert analyze('same document') == 'real answer'
+    assert len(calls) == 2
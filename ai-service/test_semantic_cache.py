@@ -0,0 +1,29 @@
+"""Tests for SemanticCache's figure fingerprints"""
+
+import numpy as np
+
+from app import SemanticCache, document_figures
+
+
+def unit(*values):
+    vector = np.array(values, dtype=np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+def test_near_duplicates_with_other_figures_are_not_reused():
+    cache = SemanticCache(dim=2, maxsize=4, threshold=0.95)
+    cache.add(unit(1, 0), 'Q2 summary', document_figures('Revenue was $56.2 billion in Q2 2024.'))
+
+    assert cache.search(unit(1, 0.01), document_figures('Revenue was $61.0 billion in Q3 2024.')) is None
+    assert cache.search(unit(1, 0.01), document_figures('In Q2 2024, revenue was $56.2 billion.')) == 'Q2 summary'
+
+
+def test_fingerprints_survive_save_and_load(tmp_path):
+    cache = SemanticCache(dim=2, maxsize=4)
+    cache.add(unit(1, 0), 'summary', document_figures('margin of 28.5%'))
+    cache.save(str(tmp_path / 'cache'))
+
+    reloaded = SemanticCache(dim=2, maxsize=4)
+    reloaded.load(str(tmp_path / 'cache'))
+    assert reloaded.search(unit(1, 0), document_figures('28.5% margin')) == 'summary'
+    assert reloaded.search(unit(1, 0), document_figures('30.1% margin')) is None
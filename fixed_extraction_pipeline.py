@@ -4,6 +4,7 @@ Better Regex + More Training Data + Simpler Approach
 """
 
 import os
+import logging
 import pandas as pd
 import numpy as np
 import re
@@ -12,13 +13,93 @@ import time
 from typing import List, Dict, Any, Tuple, Optional
 from datetime import datetime, timedelta
 from dataclasses import dataclass, field
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain
+
+# Must be set before CUDA initializes: growable segments instead of fragmenting fixed blocks
+os.environ.setdefault("PYTORCH_CUDA_ALLOC_CONF", "expandable_segments:True")
 
 import torch
 from transformers import (
-    T5Tokenizer, T5ForConditionalGeneration,
-    TrainingArguments, Trainer, DataCollatorForSeq2Seq
+    T5TokenizerFast, T5ForConditionalGeneration,
+    TrainingArguments, Trainer, DataCollatorForSeq2Seq,
+    LogitsProcessor, LogitsProcessorList
 )
-from datasets import Dataset
+from datasets import Dataset, DatasetDict, load_dataset, load_from_disk
+
+logger = logging.getLogger(__name__)
+
+# Hyperscan is optional; without it every pattern is tried with re
+try:
+    import hyperscan
+except ImportError:
+    hyperscan = None
+
+# orjson is optional; fall back to the stdlib json module when it isn't installed
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# pyahocorasick is optional; without Hyperscan it skips patterns whose literal anchor is absent
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+def json_loads(data):
+    """Parse JSON from bytes or str, using orjson when available"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def json_dumps(obj):
+    """Serialize obj to UTF-8 JSON bytes, using orjson when available"""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+def required_literal(pattern: str) -> str:
+    """Longest literal run that every match of a simple regex must contain ('' if unsure)"""
+    best = run = ''
+    depth = 0
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        literal = None
+        if char == '\\':
+            escaped = pattern[i + 1:i + 2]
+            literal = None if escaped.isalnum() else escaped  # \d, \s... are classes
+            i += 2
+        elif char == '[':
+            i = pattern.index(']', i + 2) + 1
+        elif char in '()':
+            depth += 1 if char == '(' else -1
+            i += 1
+        elif char == '|':
+            if depth == 0:
+                return ''  # top-level alternation: no single literal is required
+            i += 1
+        else:
+            literal = None if char in '.^$' else char
+            i += 1
+        
+        quantifier = pattern[i:i + 1]
+        if depth == 0 and literal is not None and quantifier not in ('?', '*', '{'):
+            run += literal
+        else:
+            best = max(best, run, key=len)
+            run = ''
+        if quantifier == '+':
+            # A repeated character can't be followed directly by the next literal
+            best = max(best, run, key=len)
+            run = ''
+        if quantifier in ('?', '*', '+'):
+            i += 2 if pattern[i + 1:i + 2] == '?' else 1
+        elif quantifier == '{':
+            i = pattern.index('}', i) + 1
+    return max(best, run, key=len)
 
 # =============================================================================
 # CONFIGURATION (Same as before)
@@ -38,9 +119,15 @@ class Config:
     model_name: str = "google/flan-t5-base"
     max_source_length: int = 512
     max_target_length: int = 128
+    attn_implementation: str = "sdpa"  # or "flash_attention_2" (needs flash-attn and an Ampere+ GPU)
+    max_new_tokens: int = 64  # generation cap - the longest target JSON is well under this
     batch_size: int = 8
+    gradient_accumulation_steps: int = 1  # raise to keep the effective batch when batch_size must shrink
     learning_rate: float = 3e-4
     num_epochs: int = 3
+    quantize_cpu_inference: bool = True  # dynamic int8 Linear layers when no GPU is available
+    compile_inference: bool = True  # torch.compile the evaluation model on GPU
+    cuda_memory_fraction: float = 0.9  # cap on this process's share of GPU memory
     
     # Paths
     data_dir: str = "data"
@@ -49,6 +136,11 @@ class Config:
     processed_data_dir: str = "data/processed"
     model_checkpoints_dir: str = "models/checkpoints"
 
+@lru_cache(maxsize=1)
+def get_config():
+    """Shared default Config for the driver functions"""
+    return Config()
+
 # =============================================================================
 # IMPROVED NER EXTRACTOR WITH BETTER PATTERNS
 # =============================================================================
@@ -56,22 +148,27 @@ class Config:
 class ImprovedFinancialExtractor:
     """MUCH BETTER financial metrics extractor"""
     
+    # Scale for each (lowercased) unit; anything else is taken as-is
+    UNIT_MULTIPLIERS = {'billion': 1000000000, 'b': 1000000000, 'million': 1000000, 'm': 1000000}
+    CURRENCY_METRICS = frozenset(('revenue', 'net_income'))
+    PERCENT_METRICS = frozenset(('profit_margin', 'growth'))
+    
     def __init__(self):
-        # IMPROVED patterns that actually work
+        # IMPROVED patterns that actually work (matched case-insensitively)
         self.patterns = {
             'revenue': [
                 # More comprehensive revenue patterns
-                r'revenue of \$?([\d,]+\.?\d*)\s*(billion|million|B|M)?',
-                r'sales of \$?([\d,]+\.?\d*)\s*(billion|million|B|M)?',
-                r'total revenue \$?([\d,]+\.?\d*)\s*(billion|million|B|M)?',
-                r'\$?([\d,]+\.?\d*)\s*(billion|million|B|M)? in revenue',
-                r'generated \$?([\d,]+\.?\d*)\s*(billion|million|B|M)?.*revenue',
-                r'revenue.*\$?([\d,]+\.?\d*)\s*(billion|million|B|M)?',
-                r'quarterly revenue.*\$?([\d,]+\.?\d*)\s*(billion|million|B|M)?',
-                r'reported.*revenue.*\$?([\d,]+\.?\d*)\s*(billion|million|B|M)?',
+                r'revenue of \$?([\d,]+\.?\d*)\s*(billion|million)?',
+                r'sales of \$?([\d,]+\.?\d*)\s*(billion|million)?',
+                r'total revenue \$?([\d,]+\.?\d*)\s*(billion|million)?',
+                r'\$?([\d,]+\.?\d*)\s*(billion|million)? in revenue',
+                r'generated \$?([\d,]+\.?\d*)\s*(billion|million)?.*revenue',
+                r'revenue.*\$?([\d,]+\.?\d*)\s*(billion|million)?',
+                r'quarterly revenue.*\$?([\d,]+\.?\d*)\s*(billion|million)?',
+                r'reported.*revenue.*\$?([\d,]+\.?\d*)\s*(billion|million)?',
                 # New patterns for the test cases
-                r'revenue was \$?([\d,]+\.?\d*)\s*(billion|million|B|M)?',
-                r'reported.*\$?([\d,]+\.?\d*)\s*(billion|million|B|M)?.*revenue',
+                r'revenue was \$?([\d,]+\.?\d*)\s*(billion|million)?',
+                r'reported.*\$?([\d,]+\.?\d*)\s*(billion|million)?.*revenue',
             ],
             'profit_margin': [
                 r'profit margin.*?(\d+\.?\d*)%',
@@ -84,13 +181,13 @@ class ImprovedFinancialExtractor:
                 r'margin of (\d+\.?\d*)%',
             ],
             'net_income': [
-                r'net income of \$?([\d,]+\.?\d*)\s*(billion|million|B|M)?',
-                r'profit of \$?([\d,]+\.?\d*)\s*(billion|million|B|M)?',
-                r'earnings of \$?([\d,]+\.?\d*)\s*(billion|million|B|M)?',
-                r'net profit \$?([\d,]+\.?\d*)\s*(billion|million|B|M)?',
+                r'net income of \$?([\d,]+\.?\d*)\s*(billion|million)?',
+                r'profit of \$?([\d,]+\.?\d*)\s*(billion|million)?',
+                r'earnings of \$?([\d,]+\.?\d*)\s*(billion|million)?',
+                r'net profit \$?([\d,]+\.?\d*)\s*(billion|million)?',
                 # New patterns
-                r'net income.*\$?([\d,]+\.?\d*)\s*(billion|million|B|M)?',
-                r'with net income of \$?([\d,]+\.?\d*)\s*(billion|million|B|M)?',
+                r'net income.*\$?([\d,]+\.?\d*)\s*(billion|million)?',
+                r'with net income of \$?([\d,]+\.?\d*)\s*(billion|million)?',
             ],
             'growth': [
                 r'growing (\d+\.?\d*)%',
@@ -104,34 +201,171 @@ class ImprovedFinancialExtractor:
                 r'(\d+\.?\d*)%.*growth',
             ]
         }
+        # Compiled once here instead of going through re's pattern cache on every call.
+        # Tuples, since the prefilter databases below number the patterns in this order
+        self.compiled_patterns = {
+            metric_type: tuple(re.compile(pattern, re.IGNORECASE) for pattern in patterns)
+            for metric_type, patterns in self.patterns.items()
+        }
+        # One alternation per metric: a single scan tells whether any of its patterns can
+        # match. The per-pattern regexes still decide which one wins, in list order.
+        # Groups are made non-capturing since only the yes/no answer is used.
+        self.metric_gates = {
+            metric_type: re.compile('|'.join(
+                '(?:' + re.sub(r'(?<!\\)\((?!\?)', '(?:', pattern) + ')' for pattern in patterns
+            ), re.IGNORECASE)
+            for metric_type, patterns in self.patterns.items()
+        }
+        # Id of each metric's first pattern in the flattened Hyperscan database
+        self.pattern_offsets = {}
+        offset = 0
+        for metric_type, patterns in self.patterns.items():
+            self.pattern_offsets[metric_type] = offset
+            offset += len(patterns)
+        self.hs_db = self.build_hyperscan_db()
+        self.anchor_automaton = self.build_anchor_automaton() if self.hs_db is None else None
+    
+    def build_hyperscan_db(self):
+        """Compile every pattern into one Hyperscan database (None if unavailable)"""
+        if hyperscan is None:
+            return None
+        expressions = [pattern.encode('utf-8') for patterns in self.patterns.values() for pattern in patterns]
+        try:
+            db = hyperscan.Database()
+            # Only "does this pattern match?" is needed - capture groups still come from re;
+            # UTF8|UCP keeps \d and \s Unicode-aware like Python's re
+            flags = (hyperscan.HS_FLAG_SINGLEMATCH | hyperscan.HS_FLAG_CASELESS |
+                     hyperscan.HS_FLAG_UTF8 | hyperscan.HS_FLAG_UCP)
+            db.compile(
+                expressions=expressions,
+                ids=list(range(len(expressions))),
+                elements=len(expressions),
+                flags=[flags] * len(expressions)
+            )
+            return db
+        except hyperscan.error as e:
+            print(f"⚠️ Hyperscan compile failed, using re only: {e}")
+            return None
+    
+    def build_anchor_automaton(self):
+        """Aho-Corasick automaton mapping each pattern's required literal to its ids (None if unavailable)"""
+        if ahocorasick is None:
+            return None
+        self.unanchored_ids = set()
+        anchors = {}
+        pattern_id = 0
+        for patterns in self.patterns.values():
+            for pattern in patterns:
+                literal = required_literal(pattern)
+                if literal:
+                    # Keyed lowercase: patterns match IGNORECASE and the text is searched lowercased
+                    anchors.setdefault(literal.lower(), []).append(pattern_id)
+                else:
+                    self.unanchored_ids.add(pattern_id)
+                pattern_id += 1
+        automaton = ahocorasick.Automaton()
+        for literal, ids in anchors.items():
+            automaton.add_word(literal, ids)
+        automaton.make_automaton()
+        return automaton
+    
+    def matching_pattern_ids(self, text_clean: str) -> Optional[set]:
+        """Ids (in self.patterns order) of the patterns that can match, from one linear pass.
+
+        Hyperscan gives the exact set; the Aho-Corasick fallback gives the patterns whose
+        required literal occurs, a superset. None when neither library is available.
+        """
+        if self.hs_db is None:
+            if self.anchor_automaton is None:
+                return None
+            candidates = set(self.unanchored_ids)
+            # The automaton is case-sensitive, so only this fallback needs a lowercased copy
+            for _, ids in self.anchor_automaton.iter(text_clean.lower()):
+                candidates.update(ids)
+            return candidates
+        try:
+            data = text_clean.encode('utf-8')
+        except UnicodeEncodeError:  # lone surrogates - let re handle it
+            return None
+        hits = set()
+        def on_match(pattern_id, start, end, flags, context):
+            hits.add(pattern_id)
+        self.hs_db.scan(data, match_event_handler=on_match)
+        return hits
     
     def extract_metrics(self, text: str) -> Dict[str, str]:
         """Extract metrics with MUCH better patterns"""
         extracted = {}
-        text_clean = text.lower().replace(',', '')  # Remove commas for easier matching
+        # Remove commas for easier matching; case is handled by IGNORECASE, so no lower() copy
+        text_clean = text.replace(',', '')
         
-        print(f"🔍 Analyzing: {text[:100]}...")  # Debug
+        debug = logger.isEnabledFor(logging.DEBUG)
+        if debug:
+            logger.debug("Analyzing: %s...", text[:100])
         
-        for metric_type, patterns in self.patterns.items():
-            for pattern in patterns:
-                matches = re.findall(pattern, text_clean)
-                if matches:
-                    print(f"  ✅ Found {metric_type}: {matches}")  # Debug
-                    for match in matches:
-                        if isinstance(match, tuple):
-                            value = match[0]
-                            unit = match[1] if len(match) > 1 else ''
-                        else:
-                            value = match
-                            unit = ''
-                        
-                        normalized = self.normalize_value(value, unit, metric_type)
-                        if normalized:
-                            extracted[metric_type] = normalized
-                            break  # Take first match
+        # Patterns the prefilter rules out are skipped without running re at all
+        hits = self.matching_pattern_ids(text_clean)
+        
+        for metric_type, compiled in self.compiled_patterns.items():
+            if hits is None and not self.metric_gates[metric_type].search(text_clean):
+                continue
+            for pattern_id, regex in enumerate(compiled, self.pattern_offsets[metric_type]):
+                if hits is not None and pattern_id not in hits:
+                    continue
+                # Matches are produced lazily, so the scan ends at the first usable one
+                matched = False
+                for match in regex.finditer(text_clean):
+                    matched = True
+                    value = match.group(1)
+                    unit = (match.group(2) or '') if regex.groups > 1 else ''
+                    
+                    normalized = self.normalize_value(value, unit, metric_type)
+                    if normalized:
+                        extracted[metric_type] = normalized
+                        break  # Take first match
+                if matched:
+                    if debug:
+                        logger.debug("Found %s: %s", metric_type, regex.findall(text_clean))
                     break  # Stop after first successful pattern
         
-        print(f"  📊 Extracted: {extracted}")  # Debug
+        if debug:
+            logger.debug("Extracted: %s", extracted)
+        return extracted
+    
+    def extract_metrics_batch(self, texts: List[str]) -> List[Dict[str, str]]:
+        """extract_metrics for many texts at once - one vectorized str.extract per pattern"""
+        texts_clean = pd.Series(texts, dtype=object).str.replace(',', '', regex=False)
+        extracted = [{} for _ in texts]
+        # One prefilter pass per row; rows it can't answer (None) fall back to the metric gates
+        hits = [self.matching_pattern_ids(text) for text in texts_clean]
+        
+        for metric_type, compiled in self.compiled_patterns.items():
+            offset = self.pattern_offsets[metric_type]
+            pattern_ids = range(offset, offset + len(compiled))
+            gate = self.metric_gates[metric_type]
+            # Rows with no possible match for this metric drop out in one scan
+            pending = texts_clean[[
+                gate.search(text) is not None if row_hits is None else not row_hits.isdisjoint(pattern_ids)
+                for text, row_hits in zip(texts_clean, hits)
+            ]]
+            for pattern_id, regex in zip(pattern_ids, compiled):
+                if pending.empty:
+                    break
+                candidates = pending[[hits[row] is None or pattern_id in hits[row] for row in pending.index]]
+                if candidates.empty:
+                    continue
+                # First match per row, same as the first findall hit in extract_metrics
+                groups = candidates.str.extract(regex)
+                found = groups[0].notna()
+                for row in groups.index[found]:
+                    value = groups.at[row, 0]
+                    unit = groups.at[row, 1] if groups.shape[1] > 1 else ''
+                    normalized = self.normalize_value(value, unit if isinstance(unit, str) else '', metric_type)
+                    if normalized:
+                        extracted[row][metric_type] = normalized
+                # Rows a pattern matched are settled, as with the break in extract_metrics
+                pending = pending.drop(groups.index[found])
+        
         return extracted
     
     def normalize_value(self, value: str, unit: str, metric_type: str) -> Optional[str]:
@@ -139,19 +373,11 @@ class ImprovedFinancialExtractor:
         try:
             numeric_value = float(value.replace(',', ''))
             
-            # Handle units
-            multiplier = 1
-            if unit.lower() in ['billion', 'b']:
-                multiplier = 1000000000
-            elif unit.lower() in ['million', 'm']:
-                multiplier = 1000000
-            
-            final_value = numeric_value * multiplier
-            
-            # Format based on metric type
-            if metric_type in ['revenue', 'net_income']:
+            # Format based on metric type; only currency values are scaled by their unit
+            if metric_type in self.CURRENCY_METRICS:
+                final_value = numeric_value * self.UNIT_MULTIPLIERS.get(unit.lower(), 1)
                 return f"${final_value:,.0f}"
-            elif metric_type in ['profit_margin', 'growth']:
+            elif metric_type in self.PERCENT_METRICS:
                 return f"{numeric_value:.1f}%"
             else:
                 return str(numeric_value)
@@ -159,6 +385,27 @@ class ImprovedFinancialExtractor:
         except (ValueError, TypeError):
             return None
 
+@lru_cache(maxsize=1)
+def get_extractor():
+    """Shared extractor - its pattern databases are built once per process"""
+    return ImprovedFinancialExtractor()
+
+EXTRACTION_ROWS_PER_WORKER = 5000  # smaller corpora are checked in-process
+
+def extract_metrics_parallel(texts: List[str]) -> List[Dict[str, str]]:
+    """extract_metrics_batch, fanned out over CPU cores for large corpora"""
+    n_workers = min(os.cpu_count() or 1, len(texts) // EXTRACTION_ROWS_PER_WORKER)
+    if n_workers <= 1:
+        return get_extractor().extract_metrics_batch(texts)
+    # Each worker builds its own extractor - the Hyperscan database can't be pickled
+    chunk_size = -(-len(texts) // n_workers)
+    chunks = [texts[i:i + chunk_size] for i in range(0, len(texts), chunk_size)]
+    with ProcessPoolExecutor(max_workers=n_workers) as pool:
+        return list(chain.from_iterable(pool.map(_extract_chunk, chunks)))
+
+def _extract_chunk(texts: List[str]) -> List[Dict[str, str]]:
+    return get_extractor().extract_metrics_batch(texts)
+
 # =============================================================================
 # BETTER TRAINING DATA GENERATOR
 # =============================================================================
@@ -166,124 +413,127 @@ class ImprovedFinancialExtractor:
 class BetterTrainingDataGenerator:
     """Generate much better training data"""
     
+    # MANY more synthetic examples covering all patterns
+    TRAINING_EXAMPLES = (
+        # Revenue examples
+        {
+            'input_text': 'Extract financial metrics from this text: Apple reported quarterly revenue of $56.2 billion with strong performance.',
+            'target_text': '{"revenue": "$56,200,000,000"}'
+        },
+        {
+            'input_text': 'Extract financial metrics from this text: Microsoft generated revenue of $45.3 billion this quarter.',
+            'target_text': '{"revenue": "$45,300,000,000"}'
+        },
+        {
+            'input_text': 'Extract financial metrics from this text: Google revenue was $70.8 billion for the quarter.',
+            'target_text': '{"revenue": "$70,800,000,000"}'
+        },
+        {
+            'input_text': 'Extract financial metrics from this text: Amazon sales of $127.4 billion exceeded expectations.',
+            'target_text': '{"revenue": "$127,400,000,000"}'
+        },
+        {
+            'input_text': 'Extract financial metrics from this text: Tesla reported $23.4 billion in revenue.',
+            'target_text': '{"revenue": "$23,400,000,000"}'
+        },
+        
+        # Profit margin examples
+        {
+            'input_text': 'Extract financial metrics from this text: Microsoft profit margin increased to 28.5% this quarter.',
+            'target_text': '{"profit_margin": "28.5%"}'
+        },
+        {
+            'input_text': 'Extract financial metrics from this text: Apple operating margin was 30.2% in Q3.',
+            'target_text': '{"profit_margin": "30.2%"}'
+        },
+        {
+            'input_text': 'Extract financial metrics from this text: Google profit margin of 25.8% shows strong performance.',
+            'target_text': '{"profit_margin": "25.8%"}'
+        },
+        
+        # Growth examples
+        {
+            'input_text': 'Extract financial metrics from this text: Tesla announced growth of 45% year-over-year in vehicle deliveries.',
+            'target_text': '{"growth": "45.0%"}'
+        },
+        {
+            'input_text': 'Extract financial metrics from this text: Amazon cloud services growing 35% annually.',
+            'target_text': '{"growth": "35.0%"}'
+        },
+        {
+            'input_text': 'Extract financial metrics from this text: Microsoft Azure revenue increased 50% year-over-year.',
+            'target_text': '{"growth": "50.0%"}'
+        },
+        
+        # Net income examples
+        {
+            'input_text': 'Extract financial metrics from this text: Google revenue was $70.8 billion with net income of $17.6 billion.',
+            'target_text': '{"net_income": "$17,600,000,000", "revenue": "$70,800,000,000"}'
+        },
+        {
+            'input_text': 'Extract financial metrics from this text: Apple net income of $22.9 billion exceeded forecasts.',
+            'target_text': '{"net_income": "$22,900,000,000"}'
+        },
+        {
+            'input_text': 'Extract financial metrics from this text: Microsoft profit of $18.3 billion shows strong quarter.',
+            'target_text': '{"net_income": "$18,300,000,000"}'
+        },
+        
+        # Multiple metrics examples
+        {
+            'input_text': 'Extract financial metrics from this text: Apple revenue of $120 billion with 25% profit margin and 15% growth.',
+            'target_text': '{"growth": "15.0%", "profit_margin": "25.0%", "revenue": "$120,000,000,000"}'
+        },
+        {
+            'input_text': 'Extract financial metrics from this text: Tesla revenue was $25.5 billion with net income of $3.2 billion and growth of 40%.',
+            'target_text': '{"growth": "40.0%", "net_income": "$3,200,000,000", "revenue": "$25,500,000,000"}'
+        },
+        
+        # Negative examples (no metrics)
+        {
+            'input_text': 'Extract financial metrics from this text: Amazon CEO discussed long-term strategy and market expansion.',
+            'target_text': '{"status": "no financial metrics found"}'
+        },
+        {
+            'input_text': 'Extract financial metrics from this text: Microsoft announced new product launch and partnership agreements.',
+            'target_text': '{"status": "no financial metrics found"}'
+        },
+        {
+            'input_text': 'Extract financial metrics from this text: Google CEO talks about AI innovation and future technology.',
+            'target_text': '{"status": "no financial metrics found"}'
+        },
+        {
+            'input_text': 'Extract financial metrics from this text: Tesla unveils new vehicle models at annual event.',
+            'target_text': '{"status": "no financial metrics found"}'
+        },
+        
+        # Edge cases with different formats
+        {
+            'input_text': 'Extract financial metrics from this text: Q3 revenue: $89.5B, up 12% YoY.',
+            'target_text': '{"growth": "12.0%", "revenue": "$89,500,000,000"}'
+        },
+        {
+            'input_text': 'Extract financial metrics from this text: Quarterly results: Revenue $67.2 billion, Operating margin 28.5%.',
+            'target_text': '{"profit_margin": "28.5%", "revenue": "$67,200,000,000"}'
+        },
+    )
+    
     def __init__(self):
-        self.extractor = ImprovedFinancialExtractor()
+        self.extractor = get_extractor()
     
     def create_comprehensive_training_data(self) -> List[Dict[str, str]]:
         """Create comprehensive training examples"""
         
-        # MANY more synthetic examples covering all patterns
-        training_examples = [
-            # Revenue examples
-            {
-                'input_text': 'Extract financial metrics from this text: Apple reported quarterly revenue of $56.2 billion with strong performance.',
-                'target_text': '{"revenue": "$56,200,000,000"}'
-            },
-            {
-                'input_text': 'Extract financial metrics from this text: Microsoft generated revenue of $45.3 billion this quarter.',
-                'target_text': '{"revenue": "$45,300,000,000"}'
-            },
-            {
-                'input_text': 'Extract financial metrics from this text: Google revenue was $70.8 billion for the quarter.',
-                'target_text': '{"revenue": "$70,800,000,000"}'
-            },
-            {
-                'input_text': 'Extract financial metrics from this text: Amazon sales of $127.4 billion exceeded expectations.',
-                'target_text': '{"revenue": "$127,400,000,000"}'
-            },
-            {
-                'input_text': 'Extract financial metrics from this text: Tesla reported $23.4 billion in revenue.',
-                'target_text': '{"revenue": "$23,400,000,000"}'
-            },
-            
-            # Profit margin examples
-            {
-                'input_text': 'Extract financial metrics from this text: Microsoft profit margin increased to 28.5% this quarter.',
-                'target_text': '{"profit_margin": "28.5%"}'
-            },
-            {
-                'input_text': 'Extract financial metrics from this text: Apple operating margin was 30.2% in Q3.',
-                'target_text': '{"profit_margin": "30.2%"}'
-            },
-            {
-                'input_text': 'Extract financial metrics from this text: Google profit margin of 25.8% shows strong performance.',
-                'target_text': '{"profit_margin": "25.8%"}'
-            },
-            
-            # Growth examples
-            {
-                'input_text': 'Extract financial metrics from this text: Tesla announced growth of 45% year-over-year in vehicle deliveries.',
-                'target_text': '{"growth": "45.0%"}'
-            },
-            {
-                'input_text': 'Extract financial metrics from this text: Amazon cloud services growing 35% annually.',
-                'target_text': '{"growth": "35.0%"}'
-            },
-            {
-                'input_text': 'Extract financial metrics from this text: Microsoft Azure revenue increased 50% year-over-year.',
-                'target_text': '{"growth": "50.0%"}'
-            },
-            
-            # Net income examples
-            {
-                'input_text': 'Extract financial metrics from this text: Google revenue was $70.8 billion with net income of $17.6 billion.',
-                'target_text': '{"net_income": "$17,600,000,000", "revenue": "$70,800,000,000"}'
-            },
-            {
-                'input_text': 'Extract financial metrics from this text: Apple net income of $22.9 billion exceeded forecasts.',
-                'target_text': '{"net_income": "$22,900,000,000"}'
-            },
-            {
-                'input_text': 'Extract financial metrics from this text: Microsoft profit of $18.3 billion shows strong quarter.',
-                'target_text': '{"net_income": "$18,300,000,000"}'
-            },
-            
-            # Multiple metrics examples
-            {
-                'input_text': 'Extract financial metrics from this text: Apple revenue of $120 billion with 25% profit margin and 15% growth.',
-                'target_text': '{"growth": "15.0%", "profit_margin": "25.0%", "revenue": "$120,000,000,000"}'
-            },
-            {
-                'input_text': 'Extract financial metrics from this text: Tesla revenue was $25.5 billion with net income of $3.2 billion and growth of 40%.',
-                'target_text': '{"growth": "40.0%", "net_income": "$3,200,000,000", "revenue": "$25,500,000,000"}'
-            },
-            
-            # Negative examples (no metrics)
-            {
-                'input_text': 'Extract financial metrics from this text: Amazon CEO discussed long-term strategy and market expansion.',
-                'target_text': '{"status": "no financial metrics found"}'
-            },
-            {
-                'input_text': 'Extract financial metrics from this text: Microsoft announced new product launch and partnership agreements.',
-                'target_text': '{"status": "no financial metrics found"}'
-            },
-            {
-                'input_text': 'Extract financial metrics from this text: Google CEO talks about AI innovation and future technology.',
-                'target_text': '{"status": "no financial metrics found"}'
-            },
-            {
-                'input_text': 'Extract financial metrics from this text: Tesla unveils new vehicle models at annual event.',
-                'target_text': '{"status": "no financial metrics found"}'
-            },
-            
-            # Edge cases with different formats
-            {
-                'input_text': 'Extract financial metrics from this text: Q3 revenue: $89.5B, up 12% YoY.',
-                'target_text': '{"growth": "12.0%", "revenue": "$89,500,000,000"}'
-            },
-            {
-                'input_text': 'Extract financial metrics from this text: Quarterly results: Revenue $67.2 billion, Operating margin 28.5%.',
-                'target_text': '{"profit_margin": "28.5%", "revenue": "$67,200,000,000"}'
-            },
-        ]
+        training_examples = [dict(example) for example in self.TRAINING_EXAMPLES]
         
         print(f"📚 Created {len(training_examples)} comprehensive training examples")
         
-        # Verify each example
+        # Verify all examples in one batched extraction pass (across cores for large corpora)
+        texts = [example['input_text'].replace('Extract financial metrics from this text: ', '') for example in training_examples]
+        extracted_all = extract_metrics_parallel(texts)
+        
         correct_count = 0
-        for i, example in enumerate(training_examples):
-            text = example['input_text'].replace('Extract financial metrics from this text: ', '')
-            extracted = self.extractor.extract_metrics(text)
+        for i, (example, extracted) in enumerate(zip(training_examples, extracted_all)):
             expected = json.loads(example['target_text'])
             
             if extracted == expected:
@@ -297,34 +547,44 @@ class BetterTrainingDataGenerator:
         return training_examples
     
     def split_and_save_data(self, training_examples: List[Dict]):
-        """Split and save training data"""
-        df = pd.DataFrame(training_examples)
-        
-        print(f"💾 Processing {len(df)} examples")
+        """Split and save training data
+
+        Each split is streamed straight to its JSONL file, one line per example,
+        without building a DataFrame copy of the corpus first, and saved once more
+        as an Arrow DatasetDict for prepare_datasets to reload.
+        """
+        print(f"💾 Processing {len(training_examples)} examples")
         
         # Split data
-        n_samples = len(df)
+        n_samples = len(training_examples)
         n_test = max(3, int(n_samples * 0.15))
         n_val = max(3, int(n_samples * 0.15))
         n_train = n_samples - n_test - n_val
         
         print(f"📊 Split: Train={n_train}, Val={n_val}, Test={n_test}")
         
-        # Shuffle and split
-        df_shuffled = df.sample(frac=1, random_state=42).reset_index(drop=True)
-        
-        train_data = df_shuffled[:n_train]
-        val_data = df_shuffled[n_train:n_train + n_val]
-        test_data = df_shuffled[n_train + n_val:]
+        # Shuffle and split (same order as DataFrame.sample(frac=1, random_state=42))
+        order = np.random.RandomState(42).permutation(n_samples)
+        splits = {
+            'train': [training_examples[i] for i in order[:n_train]],
+            'val': [training_examples[i] for i in order[n_train:n_train + n_val]],
+            'test': [training_examples[i] for i in order[n_train + n_val:]],
+        }
         
         # Save data
-        config = Config()
+        config = get_config()
         os.makedirs(config.processed_data_dir, exist_ok=True)
         
-        train_data.to_json(f"{config.processed_data_dir}/train_data.json", orient='records', lines=True)
-        val_data.to_json(f"{config.processed_data_dir}/val_data.json", orient='records', lines=True)
-        test_data.to_json(f"{config.processed_data_dir}/test_data.json", orient='records', lines=True)
+        for split, examples in splits.items():
+            with open(f"{config.processed_data_dir}/{split}_data.json", 'wb') as f:
+                for example in examples:
+                    f.write(json_dumps(example) + b'\n')
+        # Arrow copy for training: reloads memory-mapped, with no JSON parsing
+        DatasetDict({split: Dataset.from_list(examples) for split, examples in splits.items()}).save_to_disk(
+            f"{config.processed_data_dir}/arrow"
+        )
         
+        train_data, val_data, test_data = splits['train'], splits['val'], splits['test']
         print(f"✅ Data saved - Train: {len(train_data)}, Val: {len(val_data)}, Test: {len(test_data)}")
         
         return train_data, val_data, test_data
@@ -333,26 +593,136 @@ class BetterTrainingDataGenerator:
 # FIXED T5 MODEL
 # =============================================================================
 
+def cuda_inference_dtype():
+    """BF16 on GPUs that support it, else FP32 - T5 activations overflow in FP16"""
+    return torch.bfloat16 if torch.cuda.is_bf16_supported() else torch.float32
+
+def compile_for_inference(model, warmup):
+    """torch.compile model.forward and warm it up; falls back to mode="default", then eager"""
+    if getattr(model, "_compiled_for_inference", False):
+        return model  # already compiled on an earlier call
+    try:
+        import torch._inductor.config
+    except ImportError as e:
+        print(f"⚠️ torch.compile unavailable, using eager mode: {e}")
+        return model
+    inductor_triton = torch._inductor.config.triton
+    eager_forward = model.forward
+    for mode in ("reduce-overhead", "default"):
+        # CUDA graphs only for the reduce-overhead attempt; the fallback exists to avoid them
+        previous_cudagraphs = inductor_triton.cudagraphs
+        inductor_triton.cudagraphs = mode == "reduce-overhead"
+        try:
+            model.forward = torch.compile(eager_forward, mode=mode, fullgraph=False)
+            # Compilation is lazy - errors only surface on the first call
+            with torch.inference_mode():
+                warmup()
+            print(f"⚡ Model compiled (mode={mode})")
+            model._compiled_for_inference = True
+            return model
+        except Exception as e:
+            print(f"⚠️ torch.compile (mode={mode}) failed: {e}")
+        finally:
+            inductor_triton.cudagraphs = previous_cudagraphs
+    model.forward = eager_forward
+    return model
+
+class VocabularyMaskLogitsProcessor(LogitsProcessor):
+    """Only lets generation pick from a fixed set of token ids"""
+
+    def __init__(self, allowed_token_ids):
+        self.allowed_token_ids = sorted(allowed_token_ids)
+        self.mask = None
+
+    def __call__(self, input_ids, scores):
+        if self.mask is None or self.mask.device != scores.device or self.mask.shape[-1] != scores.shape[-1]:
+            # The LM head can be wider than the tokenizer vocabulary; built once per device
+            self.mask = torch.ones(scores.shape[-1], dtype=torch.bool, device=scores.device)
+            self.mask[[i for i in self.allowed_token_ids if i < scores.shape[-1]]] = False
+        return scores.masked_fill(self.mask, float("-inf"))
+
 class FixedT5ExtractionModel:
     """FIXED T5 Model"""
 
+    METRIC_KEYS = ('revenue', 'profit_margin', 'net_income', 'growth')
+    NO_METRICS_TEXT = 'no financial metrics found'
+    # T5's vocabulary has no braces, so decoded targets come back as e.g. '"revenue": "$5,000"'
+    OUTPUT_PATTERN = re.compile(r'"?(' + '|'.join(METRIC_KEYS) + r')"?\s*:\s*"?(\$?[\d,]*\.?\d+%?)')
+    # Every metric value has a digit; texts without one go straight to the no-metrics answer
+    NUMERIC_PATTERN = re.compile(r'[\d$%]')
+
     def __init__(self, config):
         self.config = config
         self.tokenizer = None
         self.model = None
         self.trainer = None
+        self.output_constraint = None
+
+    def build_output_constraint(self, target_texts=None):
+        """Logits processor limiting generation to tokens that can appear in a target
+
+        target_texts defaults to the training targets. They are tokenized exactly as
+        prepare_datasets builds the labels, since SentencePiece splits a key after a
+        quote differently from the same word on its own.
+        """
+        if target_texts is None:
+            target_texts = [example['target_text'] for example in BetterTrainingDataGenerator.TRAINING_EXAMPLES]
+        allowed = set().union(*self.tokenizer(text_target=list(target_texts))["input_ids"])
+        # Every piece made only of digits and number punctuation, for values not seen in training
+        value_chars = set('0123456789$%.,\u2581')
+        for token_id, token in enumerate(self.tokenizer.convert_ids_to_tokens(list(range(len(self.tokenizer))))):
+            if token and set(token) <= value_chars:
+                allowed.add(token_id)
+        allowed.update(i for i in (self.tokenizer.eos_token_id, self.tokenizer.pad_token_id) if i is not None)
+        return VocabularyMaskLogitsProcessor(allowed)
+
+    def check_output_constraint(self, label_ids):
+        """Raise if the generation mask blocks any token of the given training labels"""
+        allowed = set(self.output_constraint.allowed_token_ids)
+        blocked = {token_id for ids in label_ids for token_id in ids if token_id >= 0 and token_id not in allowed}
+        if blocked:
+            raise ValueError(f"Output constraint blocks trained target tokens: {self.tokenizer.convert_ids_to_tokens(sorted(blocked))}")
+
+    def parse_output(self, result: str) -> Dict[str, str]:
+        """Metrics dict from a decoded extraction ({} for the no-metrics answer)"""
+        return dict(self.OUTPUT_PATTERN.findall(result))
 
     def load_model_and_tokenizer(self):
         """Load T5 model and tokenizer"""
         print(f"🤖 Loading T5 model: {self.config.model_name}")
 
-        self.tokenizer = T5Tokenizer.from_pretrained(self.config.model_name)
-        self.model = T5ForConditionalGeneration.from_pretrained(self.config.model_name)
+        # Rust-backed tokenizer; same vocabulary and ids as the SentencePiece one
+        self.tokenizer = T5TokenizerFast.from_pretrained(self.config.model_name)
+        try:
+            # Fused attention kernels avoid materializing the full score matrix
+            self.model = T5ForConditionalGeneration.from_pretrained(
+                self.config.model_name, attn_implementation=self.config.attn_implementation
+            )
+        except (ValueError, ImportError, TypeError) as e:
+            # Transformers rejects implementations a model (or install) doesn't support
+            print(f"⚠️ {self.config.attn_implementation} attention unavailable, using eager: {e}")
+            self.model = T5ForConditionalGeneration.from_pretrained(self.config.model_name)
+
+        print(f"✅ T5 model and tokenizer loaded successfully (attention: {self.model.config._attn_implementation})")
 
-        print("✅ T5 model and tokenizer loaded successfully")
+    def optimize_for_inference(self):
+        """Switch the trained model to a faster inference setup (call after training)"""
+        self.model.eval()
+        if torch.cuda.is_available():
+            # BF16 halves weight/activation traffic
+            dtype = cuda_inference_dtype()
+            self.model = self.model.to("cuda", dtype=dtype)
+            print(f"⚡ T5 model on GPU ({dtype})")
+        elif self.config.quantize_cpu_inference:
+            self.model = torch.quantization.quantize_dynamic(self.model, {torch.nn.Linear}, dtype=torch.qint8)
+            print("⚡ T5 model quantized to int8 for CPU inference")
 
-    def prepare_datasets(self, train_data, val_data, test_data):
-        """FIXED: Prepare T5 datasets"""
+    def prepare_datasets(self, train_data=None, val_data=None, test_data=None):
+        """FIXED: Prepare T5 datasets
+
+        Without in-memory splits (DataFrames or example lists) they are reloaded from
+        what split_and_save_data wrote, as memory-mapped Arrow tables.
+        """
         
         def preprocess_function(examples):
             inputs = examples['input_text']
@@ -367,38 +737,62 @@ class FixedT5ExtractionModel:
             )
             
             # Tokenize targets
-            with self.tokenizer.as_target_tokenizer():
-                labels = self.tokenizer(
-                    targets, 
-                    max_length=self.config.max_target_length, 
-                    truncation=True,
-                    padding=False
-                )
+            labels = self.tokenizer(
+                text_target=targets, 
+                max_length=self.config.max_target_length, 
+                truncation=True,
+                padding=False
+            )
             
             model_inputs["labels"] = labels["input_ids"]
+            # Lets the length-grouped sampler batch similar-sized examples together
+            model_inputs["length"] = [len(ids) for ids in model_inputs["input_ids"]]
             return model_inputs
 
         # Convert to datasets and tokenize
-        train_dataset = Dataset.from_pandas(train_data)
-        val_dataset = Dataset.from_pandas(val_data)
-        test_dataset = Dataset.from_pandas(test_data)
+        if train_data is None:
+            arrow_dir = f"{self.config.processed_data_dir}/arrow"
+            if os.path.isdir(arrow_dir):
+                splits = load_from_disk(arrow_dir)
+            else:
+                # Splits saved before the Arrow copy existed
+                splits = load_dataset('json', data_files={
+                    split: f"{self.config.processed_data_dir}/{split}_data.json" for split in ('train', 'val', 'test')
+                })
+            train_dataset, val_dataset, test_dataset = splits['train'], splits['val'], splits['test']
+        else:
+            # DataFrames or the lists of example dicts split_and_save_data returns
+            def to_dataset(data):
+                return Dataset.from_pandas(data) if isinstance(data, pd.DataFrame) else Dataset.from_list(data)
+            train_dataset = to_dataset(train_data)
+            val_dataset = to_dataset(val_data)
+            test_dataset = to_dataset(test_data)
+
+        def tokenize(dataset):
+            # Worker processes only pay off once there are thousands of rows to tokenize
+            num_proc = min(max(1, (os.cpu_count() or 1) - 1), len(dataset) // 10000)
+            # Large batches let the Rust tokenizer encode each chunk in one call
+            return dataset.map(
+                preprocess_function,
+                batched=True,
+                batch_size=10000,
+                num_proc=num_proc if num_proc > 1 else None,
+                remove_columns=dataset.column_names,
+                load_from_cache_file=True
+            )
+
+        # Targets the model is trained to emit, for the generation mask
+        target_texts = [text for dataset in (train_dataset, val_dataset, test_dataset) for text in dataset['target_text']]
 
         # Apply preprocessing
-        train_dataset = train_dataset.map(
-            preprocess_function,
-            batched=True,
-            remove_columns=train_dataset.column_names
-        )
-        val_dataset = val_dataset.map(
-            preprocess_function,
-            batched=True,
-            remove_columns=val_dataset.column_names
-        )
-        test_dataset = test_dataset.map(
-            preprocess_function,
-            batched=True,
-            remove_columns=test_dataset.column_names
-        )
+        train_dataset = tokenize(train_dataset)
+        val_dataset = tokenize(val_dataset)
+        test_dataset = tokenize(test_dataset)
+
+        # The generation mask must allow every token the model is trained to emit
+        self.output_constraint = self.build_output_constraint(target_texts)
+        for dataset in (train_dataset, val_dataset, test_dataset):
+            self.check_output_constraint(dataset["labels"])
 
         return train_dataset, val_dataset, test_dataset
 
@@ -410,6 +804,10 @@ class FixedT5ExtractionModel:
             num_train_epochs=self.config.num_epochs,
             per_device_train_batch_size=self.config.batch_size,
             per_device_eval_batch_size=self.config.batch_size,
+            gradient_accumulation_steps=self.config.gradient_accumulation_steps,
+            # Batches of similar length need far less padding than shuffled ones
+            group_by_length=True,
+            length_column_name="length",
             warmup_steps=100,
             learning_rate=self.config.learning_rate,
             logging_steps=10,
@@ -449,42 +847,117 @@ class FixedT5ExtractionModel:
         final_model_path = f"{self.config.model_dir}/final_model"
         self.trainer.save_model(final_model_path)
         self.tokenizer.save_pretrained(final_model_path)
+        # test_better_model must not keep scoring the weights it loaded before this run
+        load_inference_model.cache_clear()
 
         print(f"✅ T5 training completed. Model saved to {final_model_path}")
 
     def extract_metrics(self, text: str) -> str:
         """Extract financial metrics from text"""
-        input_text = f"Extract financial metrics from this text: {text}"
+        return self.extract_metrics_batch([text])[0]
+
+    def extract_metrics_batch(self, texts: List[str]) -> List[str]:
+        """Extract financial metrics from many texts, one generate() call per batch"""
+        input_texts = [f"Extract financial metrics from this text: {text}" for text in texts]
+        results = [None] * len(input_texts)
+        # Skip generation for texts that can't contain a metric (the decoded form of the no-metrics target)
+        to_generate = []
+        for i, text in enumerate(texts):
+            if self.NUMERIC_PATTERN.search(text):
+                to_generate.append(i)
+            else:
+                results[i] = f'"status": "{self.NO_METRICS_TEXT}"'
+        if not to_generate:
+            return results
         
-        inputs = self.tokenizer(
-            input_text,
-            return_tensors="pt",
-            max_length=self.config.max_source_length,
-            truncation=True
-        )
+        # Tokenized once; batches are padded from these ids instead of re-tokenizing
+        token_ids = dict(zip(to_generate, self.tokenizer(
+            [input_texts[i] for i in to_generate], max_length=self.config.max_source_length, truncation=True
+        )["input_ids"]))
+        # Batch texts of similar token length together so little padding is decoded
+        order = sorted(to_generate, key=lambda i: len(token_ids[i]))
+        
+        device = self.model.device
+        for start in range(0, len(order), self.config.batch_size):
+            batch = order[start:start + self.config.batch_size]
+            inputs = self.tokenizer.pad({"input_ids": [token_ids[i] for i in batch]}, return_tensors="pt")
+            if device.type == "cuda":
+                # Page-locked host copies let the transfer run asynchronously
+                inputs = {key: value.pin_memory().to(device, non_blocking=True) for key, value in inputs.items()}
+            else:
+                inputs = {key: value.to(device) for key, value in inputs.items()}
 
-        with torch.no_grad():
-            outputs = self.model.generate(
-                inputs["input_ids"],
-                max_length=self.config.max_target_length,
-                num_beams=3,
-                temperature=0.1,
-                do_sample=False,
-                early_stopping=True
-            )
+            if self.output_constraint is None:
+                self.output_constraint = self.build_output_constraint()
 
-        result = self.tokenizer.decode(outputs[0], skip_special_tokens=True)
-        return result.strip()
+            with torch.inference_mode():
+                # Greedy decoding with the KV cache: the output is short, deterministic JSON,
+                # so beam search only multiplies the decoder work
+                outputs = self.model.generate(
+                    inputs["input_ids"],
+                    attention_mask=inputs["attention_mask"],
+                    max_new_tokens=self.config.max_new_tokens,
+                    num_beams=1,
+                    do_sample=False,
+                    use_cache=True,
+                    pad_token_id=self.tokenizer.pad_token_id,
+                    # Masking everything else stops free-text continuations before they start
+                    logits_processor=LogitsProcessorList([self.output_constraint])
+                )
+
+            decoded = self.tokenizer.batch_decode(outputs, skip_special_tokens=True)
+            for i, result in zip(batch, decoded):
+                results[i] = result.strip()
+        return results
 
 # =============================================================================
 # MAIN FUNCTIONS
 # =============================================================================
 
+# Shared by test_improved_extractor and test_better_model
+TEST_CASES = (
+    "Apple reported quarterly revenue of $56.2 billion with strong performance.",
+    "Microsoft profit margin increased to 28.5% this quarter.",
+    "Tesla announced growth of 45% year-over-year in vehicle deliveries.",
+    "Amazon CEO discussed long-term strategy and market expansion.",
+    "Google revenue was $70.8 billion with net income of $17.6 billion."
+)
+
+@lru_cache(maxsize=1)
+def test_case_ground_truths():
+    """Extractor metrics for TEST_CASES, computed in one batch pass and shared by both tests"""
+    return dict(zip(TEST_CASES, get_extractor().extract_metrics_batch(list(TEST_CASES))))
+
+@lru_cache(maxsize=1)
+def load_inference_model(model_path, device, dtype, quantize=False):
+    """Tokenizer and eval-mode model, loaded from disk once per (path, device, dtype, quantize)"""
+    tokenizer = T5TokenizerFast.from_pretrained(model_path)
+    model = T5ForConditionalGeneration.from_pretrained(model_path, torch_dtype=dtype).to(device).eval()
+    if quantize:
+        # Dynamic int8 Linear layers: a quarter of the weight traffic on CPU
+        model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        print("⚡ T5 model quantized to int8 for CPU inference")
+    # Pre-allocated K/V cache where this Transformers version supports it for T5
+    if getattr(model, "_supports_static_cache", False):
+        model.generation_config.cache_implementation = "static"
+    return tokenizer, model
+
+def saved_target_texts(config):
+    """target_text of every example in the saved JSONL splits (None if they aren't on disk)"""
+    paths = [f"{config.processed_data_dir}/{split}_data.json" for split in ('train', 'val', 'test')]
+    if not all(os.path.exists(path) for path in paths):
+        return None
+    target_texts = []
+    for path in paths:
+        with open(path, 'rb') as f:
+            target_texts.extend(json_loads(line)['target_text'] for line in f if line.strip())
+    return target_texts
+
 def create_better_training_data():
     """Create better training data"""
     print("🔧 Creating BETTER training data...")
     
-    config = Config()
+    config = get_config()
     os.makedirs(config.data_dir, exist_ok=True)
     os.makedirs(config.processed_data_dir, exist_ok=True)
     
@@ -498,78 +971,75 @@ def train_better_model():
     """Train better extraction model"""
     print("🤖 Training BETTER extraction model...")
     
-    config = Config()
+    config = get_config()
     
-    # Create better training data
-    train_data, val_data, test_data = create_better_training_data()
+    # Create better training data (saved as JSONL and Arrow splits in config.processed_data_dir)
+    create_better_training_data()
     
     # Train model
     model = FixedT5ExtractionModel(config)
     model.load_model_and_tokenizer()
     
-    train_dataset, val_dataset, test_dataset = model.prepare_datasets(train_data, val_data, test_data)
+    train_dataset, val_dataset, test_dataset = model.prepare_datasets()
     model.setup_trainer(train_dataset, val_dataset)
     model.train()
+    model.optimize_for_inference()
     
     print("✅ Better model training completed!")
     return model
 
-def test_better_model():
-    """Test the better extraction model"""
-    config = Config()
+def test_better_model(ground_truths=None, test_cases=TEST_CASES):
+    """Test the better extraction model (ground_truths: text -> metrics, e.g. from test_improved_extractor)"""
+    config = get_config()
+    if ground_truths is None:
+        ground_truths = test_case_ground_truths() if test_cases is TEST_CASES else {}
     
     # Load model
     model_path = f"{config.model_dir}/final_model"
-    tokenizer = T5Tokenizer.from_pretrained(model_path)
-    model = T5ForConditionalGeneration.from_pretrained(model_path)
-    
-    # Test cases (same as before)
-    test_cases = [
-        "Apple reported quarterly revenue of $56.2 billion with strong performance.",
-        "Microsoft profit margin increased to 28.5% this quarter.",
-        "Tesla announced growth of 45% year-over-year in vehicle deliveries.",
-        "Amazon CEO discussed long-term strategy and market expansion.",
-        "Google revenue was $70.8 billion with net income of $17.6 billion."
-    ]
+    device = "cuda" if torch.cuda.is_available() else "cpu"
+    dtype = cuda_inference_dtype() if device == "cuda" else torch.float32
+    if device == "cuda":
+        torch.cuda.set_per_process_memory_fraction(config.cuda_memory_fraction)
+    quantize = device == "cpu" and config.quantize_cpu_inference
+    tokenizer, model = load_inference_model(model_path, device, dtype, quantize)
+    test_cases = list(test_cases)
     
     print("🧪 Testing IMPROVED Extraction Model:")
     print("=" * 70)
     
-    extractor = ImprovedFinancialExtractor()
+    extractor = get_extractor()
     
-    for i, text in enumerate(test_cases, 1):
-        # Get ground truth
-        ground_truth = extractor.extract_metrics(text)
-        
-        # Get model prediction
-        input_text = f"Extract financial metrics from this text: {text}"
-        inputs = tokenizer(input_text, return_tensors="pt", max_length=512, truncation=True)
-        
-        with torch.no_grad():
-            outputs = model.generate(
-                inputs["input_ids"],
-                max_length=128,
-                num_beams=3,
-                temperature=0.1,
-                do_sample=False,
-                early_stopping=True
-            )
-        
-        result = tokenizer.decode(outputs[0], skip_special_tokens=True)
+    # The extraction model's batched path: length-sorted batches of config.batch_size,
+    # greedy decoding under the same output-vocabulary mask
+    t5 = FixedT5ExtractionModel(config)
+    t5.tokenizer, t5.model = tokenizer, model
+    # Output mask from the targets the saved model was trained on (else the generator examples)
+    t5.output_constraint = t5.build_output_constraint(saved_target_texts(config))
+    
+    if config.compile_inference and device == "cuda":
+        # The warmup generate pays the one-time compile cost
+        compile_for_inference(model, lambda: t5.extract_metrics_batch(test_cases[:config.batch_size]))
+    
+    results = t5.extract_metrics_batch(test_cases)
+    
+    for i, (text, result) in enumerate(zip(test_cases, results), 1):
+        # Get ground truth from the shared extractor pass
+        ground_truth = ground_truths[text] if text in ground_truths else extractor.extract_metrics(text)
         
         print(f"Test {i}:")
         print(f"Input: {text}")
         print(f"Ground Truth: {json.dumps(ground_truth)}")
         print(f"Model Output: {result}")
         
-        # Validate
-        try:
-            if "no financial metrics found" in result:
-                predicted = {}
-            else:
-                predicted = json.loads(result)
-        except:
-            predicted = {}
+        # Validate - T5 has no brace tokens, so only brace-wrapped output is real JSON
+        predicted = None
+        if result.startswith("{"):
+            try:
+                predicted = json_loads(result)
+            except ValueError:
+                pass
+        if not isinstance(predicted, dict):
+            predicted = t5.parse_output(result)
         
         if ground_truth == predicted:
             print("✅ PERFECT EXTRACTION!")
@@ -582,26 +1052,21 @@ def test_better_model():
 
 # Test the improved extractor first
 def test_improved_extractor():
-    """Test the improved NER extractor"""
+    """Test the improved NER extractor; returns text -> extracted metrics"""
     print("🔍 Testing IMPROVED NER Extractor:")
     print("=" * 50)
     
-    extractor = ImprovedFinancialExtractor()
-    
-    test_cases = [
-        "Apple reported quarterly revenue of $56.2 billion with strong performance.",
-        "Microsoft profit margin increased to 28.5% this quarter.",
-        "Tesla announced growth of 45% year-over-year in vehicle deliveries.",
-        "Amazon CEO discussed long-term strategy and market expansion.",
-        "Google revenue was $70.8 billion with net income of $17.6 billion."
-    ]
+    ground_truths = test_case_ground_truths()
     
-    for text in test_cases:
-        result = extractor.extract_metrics(text)
-        print(f"✅ Should work now!")
+    for text, result in ground_truths.items():
+        print(f"🔍 Input: {text}")
+        print(f"📊 Extracted: {result}")
         print()
+    
+    return ground_truths
 
-print("🚀 FIXED pipeline ready!")
-print("Run: test_improved_extractor() to test the NER")
-print("Run: train_better_model() to train with better data")
-print("Run: test_better_model() to test the final model") 
\ No newline at end of file
+if __name__ == "__main__":
+    print("🚀 FIXED pipeline ready!")
+    print("Run: test_improved_extractor() to test the NER")
+    print("Run: train_better_model() to train with better data")
+    print("Run: test_better_model() to test the final model")
@@ -0,0 +1,123 @@
+"""Tests for the regex extractor and its prefilters in fixed_extraction_pipeline"""
+
+import random
+import re
+
+import pytest
+
+from fixed_extraction_pipeline import ImprovedFinancialExtractor, required_literal
+
+WORDS = (
+    'revenue', 'Revenue', 'REVENUE', 'sales', 'of', 'total', 'in', 'generated', 'quarterly',
+    'reported', 'Reported', 'was', 'profit', 'margin', 'Margin', 'margins', 'operating', 'net',
+    'income', 'earnings', 'growing', 'growth', 'Growth', 'increased', 'up', 'rose', 'announced',
+    'year', 'with', 'to', 'billion', 'Billion', 'million', 'MILLION', 'the', 'Apple', 'quarter.',
+)
+
+
+def random_number(rng):
+    number = str(rng.randint(0, 99999))
+    if rng.random() < 0.3:
+        number = f"{int(number):,}"
+    if rng.random() < 0.4:
+        number += f".{rng.randint(0, 99)}"
+    return rng.choice(('', '$')) + number + rng.choice(('', '', '%'))
+
+
+def random_texts(count, seed=1234):
+    rng = random.Random(seed)
+    texts = []
+    for _ in range(count):
+        tokens = [
+            random_number(rng) if rng.random() < 0.25 else rng.choice(WORDS)
+            for _ in range(rng.randint(1, 14))
+        ]
+        texts.append(' '.join(tokens))
+    return texts
+
+
+def baseline_extract(extractor, text):
+    """The original semantics: re.findall over the lowercased text, patterns in order"""
+    extracted = {}
+    text_clean = text.lower().replace(',', '')
+    for metric_type, patterns in extractor.patterns.items():
+        for pattern in patterns:
+            matches = re.findall(pattern, text_clean)
+            if matches:
+                for match in matches:
+                    value, unit = match if isinstance(match, tuple) else (match, '')
+                    normalized = extractor.normalize_value(value, unit, metric_type)
+                    if normalized:
+                        extracted[metric_type] = normalized
+                        break
+                break
+    return extracted
+
+
+def make_extractor(prefilter):
+    extractor = ImprovedFinancialExtractor()
+    if prefilter == 'hyperscan':
+        pytest.importorskip('hyperscan')
+        assert extractor.hs_db is not None
+        return extractor
+    extractor.hs_db = None
+    if prefilter == 'anchors':
+        pytest.importorskip('ahocorasick')
+        extractor.anchor_automaton = extractor.build_anchor_automaton()
+    else:
+        extractor.anchor_automaton = None
+    return extractor
+
+
+TEXTS = random_texts(3000) + [
+    "Apple reported quarterly revenue of $56.2 billion with strong performance.",
+    "Microsoft profit margin increased to 28.5% this quarter.",
+    "Tesla announced growth of 45% year-over-year in vehicle deliveries.",
+    "Google revenue was $70.8 billion with net income of $17.6 billion.",
+    "No figures here at all.",
+]
+
+
+@pytest.mark.parametrize('prefilter', ['gates', 'anchors', 'hyperscan'])
+def test_extract_metrics_matches_baseline(prefilter):
+    extractor = make_extractor(prefilter)
+    for text in TEXTS:
+        assert extractor.extract_metrics(text) == baseline_extract(extractor, text), text
+
+
+@pytest.mark.parametrize('prefilter', ['gates', 'anchors', 'hyperscan'])
+def test_extract_metrics_batch_matches_single(prefilter):
+    extractor = make_extractor(prefilter)
+    assert extractor.extract_metrics_batch(TEXTS) == [extractor.extract_metrics(text) for text in TEXTS]
+
+
+@pytest.mark.parametrize('pattern, literal', [
+    (r'revenue of \$?([\d,]+\.?\d*)\s*(billion|million)?', 'revenue of '),
+    (r'\$?([\d,]+\.?\d*)\s*(billion|million)? in revenue', ' in revenue'),
+    (r'profit margin.*?(\d+\.?\d*)%', 'profit margin'),
+    (r'(\d+\.?\d*)%.*growth', 'growth'),
+    (r'revenues?', 'revenue'),
+    (r'margin|growth', ''),
+])
+def test_required_literal(pattern, literal):
+    assert required_literal(pattern) == literal
+
+
+def test_required_literal_occurs_in_every_match():
+    extractor = ImprovedFinancialExtractor()
+    for text in TEXTS:
+        text_clean = text.replace(',', '')
+        for compiled in extractor.compiled_patterns.values():
+            for regex in compiled:
+                match = regex.search(text_clean)
+                if match:
+                    assert required_literal(regex.pattern).lower() in match.group(0).lower()
+
+
+def test_anchor_prefilter_ignores_case_in_patterns():
+    pytest.importorskip('ahocorasick')
+    extractor = make_extractor('gates')
+    extractor.patterns['revenue'].insert(0, r'Q3 Revenue of \$?([\d,]+\.?\d*)\s*(billion|million)?')
+    automaton = extractor.build_anchor_automaton()
+    hits = {pattern_id for _, ids in automaton.iter('q3 revenue of $5 billion') for pattern_id in ids}
+    assert 0 in hits